@@ -1,26 +1,57 @@
 import os
+from dataclasses import dataclass
+from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
+@dataclass(frozen=True, slots=True)
 class Config:
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
-    BACKEND_PORT = int(os.getenv("BACKEND_PORT", "8000"))
-    CHROMA_PERSIST_DIRECTORY = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
+    OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
+    FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:3000")
+    BACKEND_PORT: int = int(os.getenv("BACKEND_PORT", "8000"))
+    CHROMA_PERSIST_DIRECTORY: str = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
     
     # LlamaIndex settings
-    EMBED_MODEL = "text-embedding-ada-002"
-    LLM_MODEL = "gpt-3.5-turbo"
-    CHUNK_SIZE = 512
-    CHUNK_OVERLAP = 50
+    EMBED_BACKEND: str = os.getenv("EMBED_BACKEND", "openai")  # "openai" or "tei"
+    EMBED_MODEL: str = os.getenv("EMBED_MODEL", "text-embedding-3-small")
+    EMBED_DIMENSIONS: int = int(os.getenv("EMBED_DIMENSIONS", "512"))  # Truncated (Matryoshka) size, text-embedding-3 only
+    # Texts per embeddings request; OpenAI caps a request at 300k input tokens,
+    # and 256 chunks of CHUNK_SIZE (512) tokens plus metadata stays well below that
+    EMBED_BATCH_SIZE: int = 256
+    
+    # Text Embeddings Inference server (used when EMBED_BACKEND=tei)
+    TEI_BASE_URL: str = os.getenv("TEI_BASE_URL", "http://localhost:8080")
+    TEI_MODEL: str = os.getenv("TEI_MODEL", "BAAI/bge-small-en-v1.5")
+    TEI_BATCH_SIZE: int = int(os.getenv("TEI_BATCH_SIZE", "64"))  # Raise as far as GPU memory allows
+    
+    LLM_MODEL: str = "gpt-3.5-turbo"
+    CHUNK_SIZE: int = 512
+    CHUNK_OVERLAP: int = 50
+    SIMILARITY_TOP_K: int = 5  # Nodes passed to the LLM per query
+    RERANK_CANDIDATES: int = 20  # Nodes retrieved before MMR re-ranks down to SIMILARITY_TOP_K
+    MMR_RELEVANCE_WEIGHT: float = 0.7  # Query relevance vs. diversity in MMR (1.0 = relevance only)
+    CHROMA_ADD_BATCH_SIZE: int = 5000  # Vectors per native Chroma add call
+    DOC_COUNT_TTL: float = 5.0  # Seconds to reuse the collection count for stats and health checks
+    
+    # Chroma HNSW index settings (applied when the collection is created)
+    HNSW_SPACE: str = "cosine"
+    HNSW_M: int = 32  # Graph neighbours per vector
+    HNSW_CONSTRUCTION_EF: int = 200  # Candidate list size while building the graph
+    HNSW_SEARCH_EF: int = 100  # Candidate list size while querying
     
     # Website to crawl
-    BASE_URL = "http://localhost:3000"  # This will be the frontend URL
-    MAX_DEPTH = 3  # How deep to crawl
+    BASE_URL: str = "http://localhost:3000"  # This will be the frontend URL
+    MAX_DEPTH: int = 3  # How deep to crawl
+    REQUEST_TIMEOUT: int = 10  # Seconds per HTTP request
+    MAX_CONTENT_BYTES: int = 5 * 1024 * 1024  # Larger pages are skipped
+    CRAWL_CONCURRENCY: int = 64  # Pages the crawler fetches in parallel
+    FETCH_CONCURRENCY: int = 64  # Pages downloaded in parallel while indexing
     
-    @classmethod
-    def validate(cls):
-        if not cls.OPENAI_API_KEY:
+    def validate(self):
+        if not self.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY environment variable is required")
-        return True 
\ No newline at end of file
+        return True
+
+# Environment is read once at import; share this instance instead of re-creating Config
+CONFIG = Config()
@@ -18,11 +18,28 @@ curl -s http://localhost:8000/api/stats | python3 -m json.tool
 echo ""
 echo "🚀 Starting website indexing..."
 
-# Index the website
+# Start indexing the website in the background
 RESPONSE=$(curl -s -X POST "http://localhost:8000/api/index" \
   -H "Content-Type: application/json" \
   -d '{"base_url": "http://localhost:3000"}')
 
+JOB_ID=$(echo "$RESPONSE" | python3 -c "import json, sys; print(json.load(sys.stdin).get('job_id', ''))")
+if [ -z "$JOB_ID" ]; then
+    echo "❌ Failed to start indexing:"
+    echo "$RESPONSE" | python3 -m json.tool
+    exit 1
+fi
+
+echo "⏳ Indexing job $JOB_ID started, waiting for it to finish..."
+while true; do
+    RESPONSE=$(curl -s "http://localhost:8000/api/index/$JOB_ID")
+    STATUS=$(echo "$RESPONSE" | python3 -c "import json, sys; print(json.load(sys.stdin).get('status', ''))")
+    if [ "$STATUS" != "running" ]; then
+        break
+    fi
+    sleep 2
+done
+
 echo "📝 Indexing response:"
 echo "$RESPONSE" | python3 -m json.tool
 
@@ -30,7 +30,21 @@ echo
 
 # Discover URLs
 echo -e "${BLUE}🕸️  Discovered URLs:${NC}"
-curl -s "$BACKEND_URL/api/discover" | python3 -m json.tool
+curl -s -N "$BACKEND_URL/api/discover" | python3 -c "
+import json
+import sys
+
+# Server-Sent Events: print each discovered URL as it arrives
+for line in sys.stdin:
+    if line.startswith('data: '):
+        data = json.loads(line[len('data: '):])
+        if 'url' in data:
+            print(f\"  {data['url']}\", flush=True)
+        elif 'total_count' in data:
+            print(f\"Total URLs: {data['total_count']}\")
+        else:
+            print(f\"Error: {data.get('message', 'Unknown error')}\")
+"
 echo
 
 # Get stored documents
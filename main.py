@@ -1,13 +1,16 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
+import json
 import logging
 import asyncio
+from uuid import uuid4
 from contextlib import asynccontextmanager
 
 from rag_service import RAGService
-from config import Config
+from config import CONFIG
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -16,6 +19,9 @@ logger = logging.getLogger(__name__)
 # Global RAG service instance
 rag_service = None
 
+# Indexing jobs keyed by job id (in-process; use a shared store like Redis when running multiple workers)
+index_jobs: Dict[str, Dict[str, Any]] = {}
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
@@ -43,7 +49,7 @@ app = FastAPI(
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[Config.FRONTEND_URL, "http://localhost:3000"],  # Add your frontend URL
+    allow_origins=[CONFIG.FRONTEND_URL, "http://localhost:3000"],  # Add your frontend URL
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -72,6 +78,12 @@ class IndexResponse(BaseModel):
     total_urls: Optional[int] = None
     failed_urls: Optional[List[str]] = None
 
+class IndexJobResponse(BaseModel):
+    job_id: str
+    status: str
+    result: Optional[IndexResponse] = None
+    message: Optional[str] = None
+
 class StatsResponse(BaseModel):
     success: bool
     document_count: int
@@ -92,18 +104,12 @@ class DocumentsResponse(BaseModel):
     total_count: int
     message: Optional[str] = None
 
-class DiscoverResponse(BaseModel):
-    success: bool
-    urls: List[str]
-    total_count: int
-    message: Optional[str] = None
-
 @app.get("/")
 async def root():
     return {"message": "Harbor RAG API is running"}
 
 @app.get("/health")
-async def health_check():
+def health_check():
     """Health check endpoint"""
     global rag_service
     if rag_service is None:
@@ -117,7 +123,7 @@ async def health_check():
     }
 
 @app.post("/api/chat", response_model=QueryResponse)
-async def chat(request: QueryRequest):
+def chat(request: QueryRequest):
     """
     Main chat endpoint that's compatible with the existing frontend.
     Handles both the new question format and the OpenAI-compatible format.
@@ -157,37 +163,63 @@ async def chat(request: QueryRequest):
         logger.error(f"Error in chat endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/index", response_model=IndexResponse)
+def run_indexing(job_id: str, base_url: Optional[str]):
+    """Run an indexing job and record its outcome in index_jobs"""
+    try:
+        result = rag_service.index_website(base_url)
+        index_jobs[job_id] = {
+            "status": "completed",
+            "result": IndexResponse(
+                success=result["success"],
+                message=result["message"],
+                indexed_count=result["indexed_count"],
+                total_urls=result.get("total_urls"),
+                failed_urls=result.get("failed_urls")
+            )
+        }
+        logger.info(f"Indexing job {job_id} completed")
+    except Exception as e:
+        logger.error(f"Indexing job {job_id} failed: {e}")
+        index_jobs[job_id] = {"status": "failed", "message": str(e)}
+
+@app.post("/api/index", response_model=IndexJobResponse, status_code=202)
 async def index_website(request: IndexRequest, background_tasks: BackgroundTasks):
     """
-    Index the website content. Can be run in the background.
+    Start indexing the website content in the background.
+    Poll /api/index/{job_id} for the result.
     """
     global rag_service
     if rag_service is None:
         raise HTTPException(status_code=503, detail="RAG service not initialized")
     
-    try:
-        # Run indexing in background for better UX
-        def run_indexing():
-            return rag_service.index_website(request.base_url)
-        
-        # For now, run synchronously. In production, you might want to use background tasks
-        result = run_indexing()
-        
-        return IndexResponse(
-            success=result["success"],
-            message=result["message"],
-            indexed_count=result["indexed_count"],
-            total_urls=result.get("total_urls"),
-            failed_urls=result.get("failed_urls")
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in index endpoint: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # Indexing rebuilds the collection, so only one job may run at a time
+    if any(job["status"] == "running" for job in index_jobs.values()):
+        raise HTTPException(status_code=409, detail="An indexing job is already running")
+    
+    job_id = uuid4().hex
+    index_jobs[job_id] = {"status": "running"}
+    background_tasks.add_task(run_indexing, job_id, request.base_url)
+    
+    return IndexJobResponse(job_id=job_id, status="running")
+
+@app.get("/api/index/{job_id}", response_model=IndexJobResponse)
+def get_index_job(job_id: str):
+    """
+    Get the status of an indexing job, including its result once completed
+    """
+    job = index_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown indexing job: {job_id}")
+    
+    return IndexJobResponse(
+        job_id=job_id,
+        status=job["status"],
+        result=job.get("result"),
+        message=job.get("message")
+    )
 
 @app.get("/api/stats", response_model=StatsResponse)
-async def get_stats():
+def get_stats():
     """
     Get statistics about the indexed content
     """
@@ -211,7 +243,7 @@ async def get_stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/documents", response_model=DocumentsResponse)
-async def get_documents(limit: int = 10, offset: int = 0):
+def get_documents(limit: int = 10, offset: int = 0):
     """
     Get stored documents with their content and metadata
     """
@@ -236,24 +268,26 @@ async def get_documents(limit: int = 10, offset: int = 0):
 @app.get("/api/discover")
 async def discover_urls(base_url: str = "http://localhost:3000"):
     """
-    Discover URLs that would be crawled (without indexing them)
+    Discover URLs that would be crawled (without indexing them).
+    Streams each URL as a Server-Sent Event as soon as it is found,
+    followed by a "done" event with the total count (or an "error" event).
     """
     global rag_service
     if rag_service is None:
         raise HTTPException(status_code=503, detail="RAG service not initialized")
     
-    try:
-        urls = rag_service.discover_urls(base_url, rag_service.config.MAX_DEPTH)
-        
-        return DiscoverResponse(
-            success=True,
-            urls=urls,
-            total_count=len(urls)
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in discover endpoint: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    async def events():
+        total_count = 0
+        try:
+            async for url in rag_service.stream_discovered_urls(base_url, CONFIG.MAX_DEPTH):
+                total_count += 1
+                yield f"data: {json.dumps({'url': url})}\n\n"
+            yield f"event: done\ndata: {json.dumps({'success': True, 'total_count': total_count})}\n\n"
+        except Exception as e:
+            logger.error(f"Error in discover endpoint: {e}")
+            yield f"event: error\ndata: {json.dumps({'success': False, 'message': str(e)})}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
 
 @app.post("/api/generate-questions")
 async def generate_questions():
@@ -275,4 +309,4 @@ async def generate_questions():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=Config.BACKEND_PORT) 
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=CONFIG.BACKEND_PORT) 
\ No newline at end of file
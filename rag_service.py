@@ -1,53 +1,149 @@
 import os
+import re
+import codecs
+import time
+import asyncio
 import logging
-from typing import List, Dict, Any
-from llama_index.core import VectorStoreIndex, Settings
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+from llama_index.core import VectorStoreIndex, Settings, Document
 from llama_index.core.storage.storage_context import StorageContext
 from llama_index.vector_stores.chroma import ChromaVectorStore
 from llama_index.embeddings.openai import OpenAIEmbedding
+from llama_index.embeddings.text_embeddings_inference import TextEmbeddingsInference
 from llama_index.llms.openai import OpenAI
-from llama_index.readers.web import SimpleWebPageReader
 from llama_index.core.node_parser import SimpleNodeParser
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
 import chromadb
-import requests
-from urllib.parse import urljoin, urlparse
+import httpx
+import lxml.html
+from lxml import etree
+from urllib.parse import urljoin, urlparse, ParseResult
 from bs4 import BeautifulSoup
-from config import Config
+from config import CONFIG
+from rerank import MMRRerankPostprocessor
 
 # Set up OpenAI API key in environment
 import openai
 
 logger = logging.getLogger(__name__)
 
+# Matches JavaScript navigation like: window.location.href='file.html'
+ONCLICK_LINK_RE = re.compile(r"window\.location\.href\s*=\s*['\"]([^'\"]+)['\"]")
+
+# Content types worth parsing for text and links; anything else (PDFs, images, archives) is skipped
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+def html_to_text(content: bytes, encoding: Optional[str] = None) -> str:
+    """Extract the visible text of an HTML page with lxml, collapsing whitespace
+
+    encoding is the charset from the Content-Type header; without one lxml falls back to
+    the page's <meta charset> declaration.
+    """
+    if not content.strip():
+        return ""
+    try:
+        tree = lxml.html.fromstring(content, parser=lxml.html.HTMLParser(encoding=encoding))
+    except etree.ParserError:
+        # Raised for documents with no elements at all, e.g. only a comment
+        return ""
+    etree.strip_elements(tree, etree.Comment, "script", "style", with_tail=False)
+    # Join text nodes with spaces so adjacent block elements don't run together
+    return WHITESPACE_RE.sub(" ", " ".join(tree.itertext())).strip()
+
+# Paths (lowercased, without surrounding slashes) that represent the homepage
+HOMEPAGE_PATHS = frozenset({
+    '',  # root path
+    'index.html',
+    'index.htm',
+    'index.php',
+    'home.html',
+    'home.htm',
+    'default.html',
+    'default.htm'
+})
+
+def is_homepage_url(url_parsed: ParseResult, base_parsed: ParseResult) -> bool:
+    """Check if a parsed URL represents the homepage (root or index files) of the parsed base URL"""
+    # Must be same scheme and netloc
+    if base_parsed.scheme != url_parsed.scheme or base_parsed.netloc != url_parsed.netloc:
+        return False
+    
+    return url_parsed.path.lower().strip('/') in HOMEPAGE_PATHS
+
 class RAGService:
     def __init__(self):
-        self.config = Config()
+        self.config = CONFIG
         self.config.validate()
         
         # Set OpenAI API key in environment (required for newer versions)
         os.environ["OPENAI_API_KEY"] = self.config.OPENAI_API_KEY
         
+        # Only the text-embedding-3 models accept a reduced output size
+        self.embed_dimensions = (
+            self.config.EMBED_DIMENSIONS if self.config.EMBED_MODEL.startswith("text-embedding-3") else None
+        )
+        # Recorded on the collection so an index built with another embedding model can be detected
+        if self.config.EMBED_BACKEND == "tei":
+            self.embed_model_id = f"tei:{self.config.TEI_MODEL}"
+        elif self.embed_dimensions:
+            self.embed_model_id = f"{self.config.EMBED_MODEL}:{self.embed_dimensions}"
+        else:
+            self.embed_model_id = self.config.EMBED_MODEL
+        
         # Initialize LlamaIndex settings with minimal parameters
         try:
             Settings.llm = OpenAI(model=self.config.LLM_MODEL)
-            Settings.embed_model = OpenAIEmbedding(model=self.config.EMBED_MODEL)
         except Exception as e:
-            logger.error(f"Failed to initialize OpenAI models: {e}")
-            # Fallback to default models if specific ones fail
+            logger.error(f"Failed to initialize OpenAI LLM: {e}")
+            # Fallback to the default model if the specific one fails
             Settings.llm = OpenAI()
-            Settings.embed_model = OpenAIEmbedding()
+        
+        # No fallback here: vectors from any other embedding model would not match the collection
+        Settings.embed_model = self._create_embed_model()
+        
+        # Built once; the parser's tokenizer setup is not free
+        self.node_parser = SimpleNodeParser.from_defaults(
+            chunk_size=self.config.CHUNK_SIZE,
+            chunk_overlap=self.config.CHUNK_OVERLAP
+        )
         
         # Initialize ChromaDB
         self.chroma_client = chromadb.PersistentClient(path=self.config.CHROMA_PERSIST_DIRECTORY)
         self.collection_name = "harbor_website"
         
         # Initialize vector store and index
+        self.chroma_collection = None
         self.vector_store = None
         self.index = None
         self.query_engine = None
         
+        # (count, time.monotonic() when read); None forces a fresh read
+        self._doc_count_cache: Optional[Tuple[int, float]] = None
+        
         self._setup_vector_store()
         
+    def _create_embed_model(self):
+        """Create the embedding model for the configured backend"""
+        if self.config.EMBED_BACKEND not in ("openai", "tei"):
+            raise ValueError(f"Unknown EMBED_BACKEND {self.config.EMBED_BACKEND!r}; expected 'openai' or 'tei'")
+        
+        if self.config.EMBED_BACKEND == "tei":
+            logger.info(f"Using Text Embeddings Inference server at {self.config.TEI_BASE_URL}")
+            return TextEmbeddingsInference(
+                model_name=self.config.TEI_MODEL,
+                base_url=self.config.TEI_BASE_URL,
+                embed_batch_size=self.config.TEI_BATCH_SIZE
+            )
+        
+        return OpenAIEmbedding(
+            model=self.config.EMBED_MODEL,
+            dimensions=self.embed_dimensions,
+            embed_batch_size=self.config.EMBED_BATCH_SIZE
+        )
+        
     def _setup_vector_store(self):
         """Initialize or load the vector store and index"""
         try:
@@ -55,10 +151,41 @@ class RAGService:
             chroma_collection = self.chroma_client.get_collection(self.collection_name)
             logger.info(f"Found existing collection: {self.collection_name}")
         except:
+            chroma_collection = None
+        
+        # Vectors from another embedding model can't be queried with the configured one. Keep the
+        # collection (index_website replaces it) but leave querying disabled until then
+        if chroma_collection is not None:
+            indexed_with = (chroma_collection.metadata or {}).get("embed_model")
+            if indexed_with != self.embed_model_id:
+                logger.error(
+                    f"Collection {self.collection_name} was created for embedding model "
+                    f"{indexed_with or 'unknown'} but {self.embed_model_id} is configured; "
+                    "queries are disabled until the website is re-indexed"
+                )
+                self.chroma_collection = chroma_collection
+                self._doc_count_cache = None
+                self.vector_store = None
+                self.index = None
+                self.query_engine = None
+                return
+        
+        if chroma_collection is None:
             # Create new collection if it doesn't exist
-            chroma_collection = self.chroma_client.create_collection(self.collection_name)
+            chroma_collection = self.chroma_client.create_collection(
+                self.collection_name,
+                metadata={
+                    "embed_model": self.embed_model_id,
+                    "hnsw:space": self.config.HNSW_SPACE,
+                    "hnsw:M": self.config.HNSW_M,
+                    "hnsw:construction_ef": self.config.HNSW_CONSTRUCTION_EF,
+                    "hnsw:search_ef": self.config.HNSW_SEARCH_EF
+                }
+            )
             logger.info(f"Created new collection: {self.collection_name}")
         
+        self.chroma_collection = chroma_collection
+        self._doc_count_cache = None
         self.vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
         storage_context = StorageContext.from_defaults(vector_store=self.vector_store)
         
@@ -72,170 +199,318 @@ class RAGService:
         
         self._setup_query_engine()
         
+    def _cached_count(self) -> int:
+        """Return the collection size, re-reading it from Chroma at most every DOC_COUNT_TTL seconds"""
+        now = time.monotonic()
+        if self._doc_count_cache is None or now - self._doc_count_cache[1] >= self.config.DOC_COUNT_TTL:
+            self._doc_count_cache = (self.chroma_collection.count(), now)
+        return self._doc_count_cache[0]
+        
     def _setup_query_engine(self):
         """Setup the query engine with source tracking"""
+        # Retrieve a wider candidate pool, then keep a relevant but non-redundant top-k via MMR
         self.query_engine = self.index.as_query_engine(
-            similarity_top_k=5,
+            similarity_top_k=self.config.RERANK_CANDIDATES,
+            node_postprocessors=[
+                MMRRerankPostprocessor(
+                    self.chroma_collection,
+                    top_n=self.config.SIMILARITY_TOP_K,
+                    relevance_weight=self.config.MMR_RELEVANCE_WEIGHT
+                )
+            ],
             response_mode="tree_summarize"
         )
         
+    def _http_client(self) -> httpx.AsyncClient:
+        """Create an HTTP client whose keep-alive pool covers every concurrent worker"""
+        pool_size = max(self.config.CRAWL_CONCURRENCY, self.config.FETCH_CONCURRENCY)
+        return httpx.AsyncClient(
+            timeout=self.config.REQUEST_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+        
     def discover_urls(self, base_url: str, max_depth: int = 3) -> List[str]:
         """Discover URLs by crawling the website"""
+        return asyncio.run(self.discover_urls_async(base_url, max_depth))
+        
+    async def discover_urls_async(self, base_url: str, max_depth: int = 3,
+                                  client: Optional[httpx.AsyncClient] = None,
+                                  found: Optional[asyncio.Queue] = None) -> List[str]:
+        """Discover URLs by crawling the website concurrently, also putting each one on found if given"""
+        if client is None:
+            async with self._http_client() as client:
+                return await self.discover_urls_async(base_url, max_depth, client, found)
+        
         discovered_urls = set()
-        to_visit = [(base_url, 0)]
-        visited = set()
+        visited = {base_url}
+        base_netloc = urlparse(base_url).netloc
+        semaphore = asyncio.Semaphore(self.config.CRAWL_CONCURRENCY)
         
-        while to_visit:
-            url, depth = to_visit.pop(0)
-            
-            if url in visited or depth > max_depth:
-                continue
-                
-            visited.add(url)
-            
+        async def visit(url: str, depth: int) -> List[str]:
+            """Fetch one page and return the internal links found on it"""
             try:
-                response = requests.get(url, timeout=10)
-                if response.status_code == 200:
-                    discovered_urls.add(url)
+                async with semaphore:
+                    page = await self._get_html(client, url)
+                if page is None:
+                    return []
+                
+                discovered_urls.add(url)
+                if found is not None:
+                    found.put_nowait(url)
+                
+                # Parse HTML to find more links (only if not at max depth), off the event loop
+                # since /api/discover runs this crawl on the server's loop
+                if depth < max_depth:
+                    return await asyncio.to_thread(self._extract_links, *page, url, base_netloc)
                     
-                    # Parse HTML to find more links (only if not at max depth)
-                    if depth < max_depth:
-                        soup = BeautifulSoup(response.content, 'html.parser')
-                        
-                        # Find traditional <a href="..."> links
-                        for link in soup.find_all('a', href=True):
-                            href = link['href']
-                            full_url = urljoin(url, href)
-                            
-                            # Only follow internal links
-                            if urlparse(full_url).netloc == urlparse(base_url).netloc:
-                                if full_url not in visited:
-                                    to_visit.append((full_url, depth + 1))
-                        
-                        # Find JavaScript navigation: onclick="window.location.href='...'"
-                        import re
-                        for element in soup.find_all(attrs={"onclick": True}):
-                            onclick = element.get('onclick', '')
-                            # Match patterns like: window.location.href='file.html'
-                            matches = re.findall(r"window\.location\.href\s*=\s*['\"]([^'\"]+)['\"]", onclick)
-                            for match in matches:
-                                full_url = urljoin(url, match)
-                                # Only follow internal links
-                                if urlparse(full_url).netloc == urlparse(base_url).netloc:
-                                    if full_url not in visited:
-                                        logger.info(f"Found JavaScript link: {full_url}")
-                                        to_visit.append((full_url, depth + 1))
-                                    
             except Exception as e:
                 logger.warning(f"Failed to fetch {url}: {e}")
-                
+            return []
+        
+        # Crawl one depth level at a time so every URL is reached at its shallowest depth,
+        # as in a serial breadth-first crawl, however long individual pages take
+        to_visit = [base_url]
+        for depth in range(max_depth + 1):
+            if not to_visit:
+                break
+            
+            results = await asyncio.gather(*(visit(url, depth) for url in to_visit))
+            
+            to_visit = []
+            for links in results:
+                for full_url in links:
+                    if full_url not in visited:
+                        visited.add(full_url)
+                        to_visit.append(full_url)
+            
         return list(discovered_urls)
         
-    def index_website(self, base_url: str = None) -> Dict[str, Any]:
-        """Index the entire website into the vector store, starting from homepage but excluding it"""
-        if base_url is None:
-            base_url = self.config.BASE_URL
+    async def _get_html(self, client: httpx.AsyncClient, url: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        """Download a page's body and its declared charset (if any),
+        or return None if it is not HTML or exceeds MAX_CONTENT_BYTES"""
+        limit = self.config.MAX_CONTENT_BYTES
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
             
-        logger.info(f"Starting to index website from: {base_url} (homepage will be excluded)")
+            # Decide from the headers before downloading the body. A missing Content-Type is
+            # common on static hosts, so only skip types that are declared as something else
+            content_type = response.headers.get("content-type", "").strip().lower()
+            if content_type and not content_type.startswith(HTML_CONTENT_TYPES):
+                logger.info(f"Skipping non-HTML content ({content_type}): {url}")
+                return None
+            content_length = response.headers.get("content-length", "")
+            if content_length.isdigit() and int(content_length) > limit:
+                logger.warning(f"Skipping page larger than {limit} bytes: {url}")
+                return None
+            
+            # Content-Length may be missing or wrong, so enforce the cap while reading too
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) > limit:
+                    logger.warning(f"Skipping page larger than {limit} bytes: {url}")
+                    return None
+            
+            # Ignore charsets Python doesn't know, so the parser sniffs the page's <meta charset> instead
+            encoding = response.charset_encoding
+            if encoding is not None:
+                try:
+                    codecs.lookup(encoding)
+                except LookupError:
+                    encoding = None
+            return bytes(body), encoding
+        
+    async def stream_discovered_urls(self, base_url: str, max_depth: int = 3) -> AsyncIterator[str]:
+        """Yield URLs as the crawler discovers them; the crawl is cancelled if the consumer stops early"""
+        found = asyncio.Queue()
+        crawl = asyncio.create_task(self.discover_urls_async(base_url, max_depth, found=found))
+        # None marks the end of the crawl, however it finished
+        crawl.add_done_callback(lambda _: found.put_nowait(None))
+        
+        try:
+            while (url := await found.get()) is not None:
+                yield url
+            # Re-raise any error that ended the crawl
+            await crawl
+        finally:
+            crawl.cancel()
         
-        # Clear existing collection to avoid duplicates
+    def _extract_links(self, content: bytes, encoding: Optional[str], url: str, base_netloc: str) -> List[str]:
+        """Find internal links on a page, including JavaScript navigation"""
+        links = []
         try:
-            collection = self.chroma_client.get_collection(self.collection_name)
-            # Delete all documents in the collection
-            all_docs = collection.get()
-            if all_docs.get("ids"):
-                collection.delete(ids=all_docs["ids"])
-                logger.info(f"Cleared {len(all_docs['ids'])} existing documents from collection")
+            soup = BeautifulSoup(content, 'lxml', from_encoding=encoding)
         except Exception as e:
-            logger.info(f"No existing collection to clear: {e}")
+            logger.warning(f"lxml could not parse {url}, falling back to html.parser: {e}")
+            soup = BeautifulSoup(content, 'html.parser', from_encoding=encoding)
         
-        # Recreate the index
-        self._setup_vector_store()
+        # Find traditional <a href="..."> links
+        for link in soup.find_all('a', href=True):
+            href = link['href']
+            full_url = urljoin(url, href)
+            
+            # Only follow internal links
+            if urlparse(full_url).netloc == base_netloc:
+                links.append(full_url)
         
-        # Discover all URLs starting from the homepage
-        urls = self.discover_urls(base_url, self.config.MAX_DEPTH)
-        logger.info(f"Discovered {len(urls)} URLs total")
+        # Find JavaScript navigation: onclick="window.location.href='...'"
+        for element in soup.find_all(attrs={"onclick": True}):
+            onclick = element.get('onclick', '')
+            for match in ONCLICK_LINK_RE.findall(onclick):
+                full_url = urljoin(url, match)
+                # Only follow internal links
+                if urlparse(full_url).netloc == base_netloc:
+                    logger.info(f"Found JavaScript link: {full_url}")
+                    links.append(full_url)
         
-        # Remove the homepage and its variations from the list of URLs to index
-        def is_homepage_url(url, base_url):
-            """Check if a URL represents the homepage (root or index files)"""
-            from urllib.parse import urlparse, urljoin
-            
-            base_parsed = urlparse(base_url)
-            url_parsed = urlparse(url)
-            
-            # Must be same scheme and netloc
-            if base_parsed.scheme != url_parsed.scheme or base_parsed.netloc != url_parsed.netloc:
-                return False
-            
-            # Get the path part
-            path = url_parsed.path.lower().strip('/')
-            
-            # Check for various homepage representations
-            homepage_paths = [
-                '',  # root path
-                'index.html',
-                'index.htm', 
-                'index.php',
-                'home.html',
-                'home.htm',
-                'default.html',
-                'default.htm'
-            ]
+        return links
+        
+    async def _fetch_all(self, urls: List[str], client: httpx.AsyncClient) -> Tuple[List[Document], List[str]]:
+        """Fetch pages concurrently and convert them to text documents"""
+        semaphore = asyncio.Semaphore(self.config.FETCH_CONCURRENCY)
+        
+        async def fetch(url: str):
+            async with semaphore:
+                try:
+                    logger.info(f"Indexing: {url}")
+                    page = await self._get_html(client, url)
+                    text = html_to_text(*page) if page is not None else ""
+                    if not text:
+                        logger.warning(f"No content extracted from: {url}")
+                        return url, None
+                    logger.info(f"Successfully fetched: {url}")
+                    return url, Document(
+                        text=text,
+                        metadata={
+                            "source_url": url,
+                            "source_type": "web_page"
+                        }
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to index {url}: {e}")
+                    return url, None
+        
+        results = await asyncio.gather(*(fetch(url) for url in urls))
+        
+        documents = [doc for _, doc in results if doc is not None]
+        failed_urls = [url for url, doc in results if doc is None]
+        return documents, failed_urls
+        
+    def _add_nodes(self, nodes: List[BaseNode]) -> List[str]:
+        """Embed nodes in bulk and write them to Chroma with batched native adds.
+        A failing batch is skipped; the source URLs of its nodes are returned as failed."""
+        failed_urls = set()
+        ids, documents, metadatas, embeddings = [], [], [], []
+        
+        batch_size = self.config.EMBED_BATCH_SIZE
+        for start in range(0, len(nodes), batch_size):
+            batch = nodes[start:start + batch_size]
+            try:
+                texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in batch]
+                embeddings.extend(Settings.embed_model.get_text_embedding_batch(texts))
+            except Exception as e:
+                logger.error(f"Failed to embed nodes {start}-{start + len(batch) - 1}: {e}")
+                failed_urls.update(node.metadata.get("source_url") for node in batch)
+                continue
             
-            return path in homepage_paths
+            # Same layout ChromaVectorStore.add writes, so the index can read these back
+            ids.extend(node.node_id for node in batch)
+            documents.extend(node.get_content(metadata_mode=MetadataMode.NONE) for node in batch)
+            metadatas.extend(node_to_metadata_dict(node, remove_text=True, flat_metadata=True) for node in batch)
+        
+        batch_size = self.config.CHROMA_ADD_BATCH_SIZE
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            try:
+                self.chroma_collection.add(
+                    ids=ids[start:end],
+                    documents=documents[start:end],
+                    metadatas=metadatas[start:end],
+                    embeddings=embeddings[start:end]
+                )
+            except Exception as e:
+                logger.error(f"Failed to add nodes {start}-{min(end, len(ids)) - 1} to collection: {e}")
+                failed_urls.update(metadata.get("source_url") for metadata in metadatas[start:end])
+        
+        # A page's nodes can span several batches; drop the ones that did get in so the index
+        # holds no partial pages that are reported as failed
+        failed = sorted(url for url in failed_urls if url)
+        if failed:
+            try:
+                self.chroma_collection.delete(where={"source_url": {"$in": failed}})
+            except Exception as e:
+                logger.error(f"Failed to remove partially indexed pages from collection: {e}")
         
-        urls_to_index = [url for url in urls if not is_homepage_url(url, base_url)]
-        excluded_urls = [url for url in urls if is_homepage_url(url, base_url)]
+        logger.info(f"Added nodes to collection: {self.collection_name} ({len(failed)} URLs failed)")
+        return failed
+        
+    def _exclude_homepage(self, urls: List[str], base_url: str) -> List[str]:
+        """Remove the homepage and its variations from the list of URLs to index"""
+        base_parsed = urlparse(base_url)
+        urls_to_index = []
+        excluded_urls = []
+        for url in urls:
+            if is_homepage_url(urlparse(url), base_parsed):
+                excluded_urls.append(url)
+            else:
+                urls_to_index.append(url)
         
         logger.info(f"Excluding {len(excluded_urls)} homepage URLs from indexing:")
         for excluded_url in excluded_urls:
             logger.info(f"  - {excluded_url}")
         logger.info(f"Will index {len(urls_to_index)} URLs (excluding homepage variations)")
         
+        return urls_to_index
+        
+    async def _crawl_and_fetch(self, base_url: str) -> Tuple[List[str], List[Document], List[str]]:
+        """Discover the website's pages, then fetch the non-homepage ones with the same client"""
+        async with self._http_client() as client:
+            # Discover all URLs starting from the homepage
+            urls = await self.discover_urls_async(base_url, self.config.MAX_DEPTH, client)
+            logger.info(f"Discovered {len(urls)} URLs total")
+            
+            urls_to_index = self._exclude_homepage(urls, base_url)
+            if not urls_to_index:
+                return urls_to_index, [], []
+            
+            # Fetch all pages concurrently; they are parsed and inserted in one pass afterwards
+            documents, failed_urls = await self._fetch_all(urls_to_index, client)
+            
+        return urls_to_index, documents, failed_urls
+        
+    def index_website(self, base_url: str = None) -> Dict[str, Any]:
+        """Index the entire website into the vector store, starting from homepage but excluding it"""
+        if base_url is None:
+            base_url = self.config.BASE_URL
+            
+        logger.info(f"Starting to index website from: {base_url} (homepage will be excluded)")
+        
+        # Drop the existing collection to avoid duplicates; recreating it also applies the current HNSW settings
+        try:
+            self.chroma_client.delete_collection(self.collection_name)
+            logger.info(f"Deleted existing collection: {self.collection_name}")
+        except Exception as e:
+            logger.info(f"No existing collection to clear: {e}")
+        
+        # Recreate the index
+        self._setup_vector_store()
+        
+        # Crawl and fetch over one pooled client so fetching reuses the crawl's connections
+        urls_to_index, documents, failed_urls = asyncio.run(self._crawl_and_fetch(base_url))
+        
         if not urls_to_index:
             return {"success": False, "message": "No URLs to index after excluding homepage", "indexed_count": 0}
         
-        # Load documents using SimpleWebPageReader
-        reader = SimpleWebPageReader(html_to_text=True)
+        if documents:
+            nodes = self.node_parser.get_nodes_from_documents(documents)
+            failed_urls.extend(self._add_nodes(nodes))
         
-        successfully_indexed = 0
-        failed_urls = []
+        successfully_indexed = len(urls_to_index) - len(failed_urls)
         
-        for url in urls_to_index:
-            try:
-                logger.info(f"Indexing: {url}")
-                documents = reader.load_data([url])
-                
-                if documents:
-                    # Add metadata to documents
-                    for doc in documents:
-                        doc.metadata.update({
-                            "source_url": url,
-                            "source_type": "web_page"
-                        })
-                    
-                    # Parse documents into nodes
-                    parser = SimpleNodeParser.from_defaults(
-                        chunk_size=self.config.CHUNK_SIZE,
-                        chunk_overlap=self.config.CHUNK_OVERLAP
-                    )
-                    nodes = parser.get_nodes_from_documents(documents)
-                    
-                    # Add nodes to index
-                    self.index.insert_nodes(nodes)
-                    successfully_indexed += 1
-                    logger.info(f"Successfully indexed: {url}")
-                else:
-                    logger.warning(f"No content extracted from: {url}")
-                    failed_urls.append(url)
-                    
-            except Exception as e:
-                logger.error(f"Failed to index {url}: {e}")
-                failed_urls.append(url)
-        
-        # Refresh query engine after indexing
+        # Refresh query engine and document count after indexing
         self._setup_query_engine()
+        self._doc_count_cache = None
         
         return {
             "success": True,
@@ -259,28 +534,23 @@ class RAGService:
             # Query the index
             response = self.query_engine.query(question)
             
-            # Extract sources from the response
-            sources = []
+            # Extract sources from the response, keeping the best-scoring node per URL
+            best_sources: Dict[str, Dict[str, Any]] = {}
             if hasattr(response, 'source_nodes') and response.source_nodes:
                 for node in response.source_nodes:
-                    if hasattr(node.node, 'metadata') and 'source_url' in node.node.metadata:
-                        source_info = {
-                            "url": node.node.metadata['source_url'],
-                            "score": float(node.score) if hasattr(node, 'score') else 0.0,
+                    url = node.node.metadata.get('source_url') if hasattr(node.node, 'metadata') else None
+                    if not url:
+                        continue
+                    score = float(node.score) if getattr(node, 'score', None) is not None else 0.0
+                    if url not in best_sources or best_sources[url]['score'] < score:
+                        best_sources[url] = {
+                            "url": url,
+                            "score": score,
                             "text_snippet": node.node.text[:200] + "..." if len(node.node.text) > 200 else node.node.text
                         }
-                        sources.append(source_info)
-            
-            # Remove duplicate sources based on URL
-            unique_sources = []
-            seen_urls = set()
-            for source in sources:
-                if source['url'] not in seen_urls:
-                    unique_sources.append(source)
-                    seen_urls.add(source['url'])
             
             # Sort by relevance score (descending)
-            unique_sources.sort(key=lambda x: x['score'], reverse=True)
+            unique_sources = sorted(best_sources.values(), key=lambda x: x['score'], reverse=True)
             
             return {
                 "success": True,
@@ -301,14 +571,13 @@ class RAGService:
     def get_index_stats(self) -> Dict[str, Any]:
         """Get statistics about the indexed content"""
         try:
-            collection = self.chroma_client.get_collection(self.collection_name)
-            doc_count = collection.count()
+            doc_count = self._cached_count()
             
             return {
                 "success": True,
                 "document_count": doc_count,
                 "collection_name": self.collection_name,
-                "is_ready": doc_count > 0
+                "is_ready": doc_count > 0 and self.query_engine is not None
             }
         except Exception as e:
             return {
@@ -321,10 +590,8 @@ class RAGService:
     def get_documents(self, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
         """Get stored documents with their content and metadata"""
         try:
-            collection = self.chroma_client.get_collection(self.collection_name)
-            
             # Get documents with pagination - ids are included by default
-            result = collection.get(
+            result = self.chroma_collection.get(
                 limit=limit,
                 offset=offset,
                 include=["documents", "metadatas"]
@@ -347,7 +614,7 @@ class RAGService:
                         "metadata": metadata
                     })
             
-            total_count = collection.count()
+            total_count = self._cached_count()
             
             return {
                 "success": True,
@@ -0,0 +1,76 @@
+import logging
+from typing import Any, List, Optional
+
+import numpy as np
+from llama_index.core import Settings
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
+from llama_index.core.schema import NodeWithScore, QueryBundle
+
+logger = logging.getLogger(__name__)
+
+class MMRRerankPostprocessor(BaseNodePostprocessor):
+    """Pick top_n nodes from a wider retrieval pool by maximal marginal relevance (MMR).
+
+    Chroma already ranks candidates by cosine similarity to the query; MMR additionally
+    penalizes candidates that are near-duplicates of nodes already picked, so the final
+    nodes cover more distinct passages (and pages) than the plain top_n would.
+    """
+
+    top_n: int = Field(default=5, description="Number of nodes to keep after re-ranking")
+    relevance_weight: float = Field(
+        default=0.7, description="Weight of query relevance versus diversity (1.0 = relevance only)"
+    )
+    _collection: Any = PrivateAttr()
+
+    def __init__(self, collection: Any, top_n: int = 5, relevance_weight: float = 0.7, **kwargs: Any):
+        super().__init__(top_n=top_n, relevance_weight=relevance_weight, **kwargs)
+        self._collection = collection
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "MMRRerankPostprocessor"
+
+    def _postprocess_nodes(
+        self,
+        nodes: List[NodeWithScore],
+        query_bundle: Optional[QueryBundle] = None,
+    ) -> List[NodeWithScore]:
+        if query_bundle is None or not nodes:
+            return nodes[:self.top_n]
+
+        # The retriever stores the query embedding on the bundle; only embed again if it did not
+        query_embedding = query_bundle.embedding
+        if query_embedding is None:
+            query_embedding = Settings.embed_model.get_query_embedding(query_bundle.query_str)
+
+        # Chroma does not return embeddings with query results, so load them in one batched get
+        node_ids = [node.node.node_id for node in nodes]
+        result = self._collection.get(ids=node_ids, include=["embeddings"])
+        embeddings_by_id = dict(zip(result["ids"], result["embeddings"]))
+        if any(node_id not in embeddings_by_id for node_id in node_ids):
+            logger.warning("Missing embeddings for some retrieved nodes, skipping re-rank")
+            return nodes[:self.top_n]
+
+        # Unit-normalize so every dot product below is a cosine similarity
+        candidates = np.asarray([embeddings_by_id[node_id] for node_id in node_ids], dtype=np.float32)
+        candidates /= np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+
+        relevance = candidates @ query
+        similarity = candidates @ candidates.T
+
+        selected: List[int] = []
+        # Highest (non-negative) similarity of each candidate to anything selected so far
+        redundancy = np.zeros(len(nodes), dtype=np.float32)
+        available = np.ones(len(nodes), dtype=bool)
+        for _ in range(min(self.top_n, len(nodes))):
+            mmr = self.relevance_weight * relevance - (1 - self.relevance_weight) * redundancy
+            best = int(np.argmax(np.where(available, mmr, -np.inf)))
+            selected.append(best)
+            available[best] = False
+            redundancy = np.maximum(redundancy, similarity[best])
+
+        # Report query relevance (cosine) as the score, whatever the selection order
+        return [NodeWithScore(node=nodes[i].node, score=float(relevance[i])) for i in selected]